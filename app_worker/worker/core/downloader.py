@@ -1,6 +1,9 @@
-import glob
+import asyncio
+import errno
 import logging
+import os
 import shutil
+from functools import partial
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Callable
@@ -8,7 +11,7 @@ from typing import Callable
 import yt_dlp
 from yt_shared.enums import DownMediaType
 from yt_shared.schemas.media import Audio, DownMedia, InbMediaPayload, Video
-from yt_shared.utils.common import format_bytes, gen_random_str
+from yt_shared.utils.common import LazyStr, format_bytes, gen_random_str
 from yt_shared.utils.file import file_size, list_files_human, remove_dir
 
 from worker.core.config import settings
@@ -31,17 +34,25 @@ class MediaDownloader:
         FINAL_THUMBNAIL_FORMAT: 'thumbnail',
     }
 
+    # Resolved once per process, see `_get_tmp_download_path`.
+    _tmp_download_path: Path | None = None
+
     def __init__(self) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._tmp_downloaded_dest_dir = (
             settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOADED_DIR
         )
 
-    def download(
+    async def download(
         self, host_conf: AbstractHostConfig, media_payload: InbMediaPayload
     ) -> DownMedia:
         try:
-            return self._download(host_conf=host_conf, media_payload=media_payload)
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                partial(
+                    self._download, host_conf=host_conf, media_payload=media_payload
+                ),
+            )
         except Exception:
             self._log.error('Failed to download %s', host_conf.url)
             raise
@@ -52,57 +63,80 @@ class MediaDownloader:
         media_type = media_payload.download_media_type
         url = host_conf.url
         self._log.info('Downloading %s, media_type %s', url, media_type)
-        tmp_down_path = settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOAD_DIR
-        with TemporaryDirectory(prefix='tmp_media_dir-', dir=tmp_down_path) as tmp_dir:
-            curr_tmp_dir = tmp_down_path / tmp_dir
-
+        with TemporaryDirectory(
+            prefix='tmp_media_dir-', dir=self._get_tmp_download_path()
+        ) as tmp_dir:
+            curr_tmp_dir = Path(tmp_dir)
             ytdl_opts_model = host_conf.build_config(
                 media_type=media_type, curr_tmp_dir=curr_tmp_dir
             )
-
-            with yt_dlp.YoutubeDL(ytdl_opts_model.ytdl_opts) as ytdl:
-                self._log.info('Downloading %s', url)
-                self._log.info('Downloading to %s', curr_tmp_dir)
-                self._log.info('Downloading with options %s', ytdl_opts_model.ytdl_opts)
-
-                meta: dict | None = ytdl.extract_info(url, download=True)
-                if not meta:
-                    err_msg = 'Error during media download. Check logs.'
-                    self._log.error('%s. Meta: %s', err_msg, meta)
-                    raise MediaDownloaderError(err_msg)
-
-                current_files = list(curr_tmp_dir.iterdir())
-                if not current_files:
-                    err_msg = 'Nothing downloaded. Is URL valid?'
-                    self._log.error(err_msg)
-                    raise MediaDownloaderError(err_msg)
-
-                meta_sanitized = ytdl.sanitize_info(meta)
-
-            self._log.info('Finished downloading %s', url)
-            self._log.debug('Downloaded "%s" meta: %s', url, meta_sanitized)
-            self._log.info(
-                'Content of "%s": %s', curr_tmp_dir, list_files_human(curr_tmp_dir)
-            )
-
-            destination_dir = self._tmp_downloaded_dest_dir / gen_random_str(
-                length=self._DESTINATION_TMP_DIR_NAME_LEN
+            meta = self._extract_info(
+                url=url, ytdl_opts=ytdl_opts_model.ytdl_opts, curr_tmp_dir=curr_tmp_dir
             )
-            destination_dir.mkdir()
-
-            audio, video = self._create_media_dtos(
+            return self._process_downloaded(
+                url=url,
                 media_type=media_type,
                 meta=meta,
                 curr_tmp_dir=curr_tmp_dir,
-                destination_dir=destination_dir,
                 custom_video_filename=media_payload.custom_filename,
             )
+
+    def _extract_info(self, url: str, ytdl_opts: dict, curr_tmp_dir: Path) -> dict:
+        with yt_dlp.YoutubeDL(ytdl_opts) as ytdl:
             self._log.info(
-                'Removing temporary download directory "%s" with leftover files %s',
-                curr_tmp_dir,
-                list_files_human(curr_tmp_dir),
+                'Downloading %s to "%s" with options %s', url, curr_tmp_dir, ytdl_opts
             )
 
+            meta: dict | None = ytdl.extract_info(url, download=True)
+            if not meta:
+                err_msg = 'Error during media download. Check logs.'
+                self._log.error('%s. Meta: %s', err_msg, meta)
+                raise MediaDownloaderError(err_msg)
+
+            with os.scandir(curr_tmp_dir) as entries:
+                is_empty = next(entries, None) is None
+            if is_empty:
+                err_msg = 'Nothing downloaded. Is URL valid?'
+                self._log.error(err_msg)
+                raise MediaDownloaderError(err_msg)
+
+        self._log.info('Finished downloading %s', url)
+        return meta
+
+    def _process_downloaded(
+        self,
+        url: str,
+        media_type: DownMediaType,
+        meta: dict,
+        curr_tmp_dir: Path,
+        custom_video_filename: str | None = None,
+    ) -> DownMedia:
+        # Sanitized meta is always persisted with the downloaded files.
+        meta_sanitized = yt_dlp.YoutubeDL.sanitize_info(meta)
+        self._log.debug('Downloaded "%s" meta: %s', url, meta_sanitized)
+        self._log.info(
+            'Content of "%s": %s',
+            curr_tmp_dir,
+            LazyStr(lambda: list_files_human(curr_tmp_dir)),
+        )
+
+        destination_dir = self._tmp_downloaded_dest_dir / gen_random_str(
+            length=self._DESTINATION_TMP_DIR_NAME_LEN
+        )
+        destination_dir.mkdir()
+
+        audio, video = self._create_media_dtos(
+            media_type=media_type,
+            meta=meta,
+            curr_tmp_dir=curr_tmp_dir,
+            destination_dir=destination_dir,
+            custom_video_filename=custom_video_filename,
+        )
+        self._log.info(
+            'Removing temporary download directory "%s" with leftover files %s',
+            curr_tmp_dir,
+            LazyStr(lambda: list_files_human(curr_tmp_dir)),
+        )
         return DownMedia(
             media_type=media_type,
             audio=audio,
@@ -111,6 +145,35 @@ class MediaDownloader:
             root_path=destination_dir,
         )
 
+    def _get_tmp_download_path(self) -> Path:
+        """Return temporary download path located on the destination filesystem.
+
+        Downloaded files are moved with `os.replace` which works only within
+        the same filesystem, so fall back to the destination dir if needed.
+        Renames across bind mounts of the same device are handled in `_move`.
+        Both paths come from settings and are created on worker start,
+        so the check is done only once.
+        """
+        cls = self.__class__
+        if cls._tmp_download_path is None:
+            cls._tmp_download_path = self._resolve_tmp_download_path()
+        return cls._tmp_download_path
+
+    def _resolve_tmp_download_path(self) -> Path:
+        tmp_down_path = settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOAD_DIR
+        if (
+            os.stat(tmp_down_path).st_dev
+            != os.stat(self._tmp_downloaded_dest_dir).st_dev
+        ):
+            self._log.warning(
+                '"%s" and "%s" are on different filesystems, downloading to "%s"',
+                tmp_down_path,
+                self._tmp_downloaded_dest_dir,
+                self._tmp_downloaded_dest_dir,
+            )
+            return self._tmp_downloaded_dest_dir
+        return tmp_down_path
+
     def _create_media_dtos(
         self,
         media_type: DownMediaType,
@@ -151,7 +214,9 @@ class MediaDownloader:
         destination_dir: Path,
         custom_video_filename: str | None = None,
     ) -> Video:
-        video_filename = self._get_video_filename(meta)
+        entry = self._pick_entry(meta)
+        requested_video, requested_filepath = self._resolve_requested_video(entry)
+        video_filename = Path(requested_filepath).name
         video_filepath = curr_tmp_dir / video_filename
 
         if custom_video_filename:
@@ -160,7 +225,7 @@ class MediaDownloader:
             dest_path = destination_dir / video_filename
 
         self._log.info('Moving "%s" to "%s"', video_filepath, dest_path)
-        shutil.move(video_filepath, dest_path)
+        self._move(video_filepath, dest_path)
 
         thumb_path: Path | None = None
         thumb_name = self._find_downloaded_file(
@@ -169,10 +234,10 @@ class MediaDownloader:
         )
         if thumb_name:
             _thumb_path = curr_tmp_dir / thumb_name
-            shutil.move(_thumb_path, destination_dir)
             thumb_path = destination_dir / thumb_name
+            self._move(_thumb_path, thumb_path)
 
-        duration, width, height = self._get_video_context(meta)
+        duration, width, height = self._get_video_context(entry, requested_video)
         return Video(
             title=meta['title'],
             original_filename=video_filename,
@@ -198,48 +263,50 @@ class MediaDownloader:
             extension=FINAL_AUDIO_FORMAT,
         )
         audio_filepath = curr_tmp_dir / audio_filename
-        self._log.info('Moving "%s" to "%s"', audio_filepath, destination_dir)
-        shutil.move(audio_filepath, destination_dir)
+        dest_path = destination_dir / audio_filename
+        self._log.info('Moving "%s" to "%s"', audio_filepath, dest_path)
+        self._move(audio_filepath, dest_path)
         return Audio(
             title=meta['title'],
             original_filename=audio_filename,
             duration=None,
             directory_path=destination_dir,
-            file_size=file_size(destination_dir / audio_filename),
+            file_size=file_size(dest_path),
         )
 
+    def _move(self, src: Path, dst: Path) -> None:
+        try:
+            os.replace(src, dst)
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+            self._log.warning(
+                'Failed to rename "%s" across mount points, copying instead', src
+            )
+            shutil.move(src, dst)
+
     def _find_downloaded_file(self, root_path: Path, extension: str) -> str | None:
         """Try to find downloaded audio or thumbnail file."""
         verbose_name = self._EXT_TO_NAME[extension]
-        for file_name in glob.glob(f'*.{extension}', root_dir=root_path):
-            self._log.info(
-                'Found downloaded %s: "%s" [%s]',
-                verbose_name,
-                file_name,
-                format_bytes(file_size(root_path / file_name)),
-            )
-            return file_name
+        suffix = f'.{extension}'
+        with os.scandir(root_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and entry.is_file():
+                    self._log.info(
+                        'Found downloaded %s: "%s" [%s]',
+                        verbose_name,
+                        entry.name,
+                        format_bytes(entry.stat().st_size),
+                    )
+                    return entry.name
         self._log.info('Downloaded %s not found in "%s"', verbose_name, root_path)
         return None
 
     def _get_video_context(
-        self, meta: dict
+        self, entry: dict, requested_video: dict
     ) -> tuple[float | None, int | float | None, int | float | None]:
-        if meta['_type'] == self._PLAYLIST_TYPE:
-            if not len(meta['entries']):
-                raise ValueError(
-                    'Item said to be downloaded but no entries to process.'
-                )
-            entry: dict = meta['entries'][0]
-            requested_video = self._get_requested_video(entry['requested_downloads'])
-            return (
-                self._to_float(entry.get('duration')),
-                requested_video.get('width'),
-                requested_video.get('height'),
-            )
-        requested_video = self._get_requested_video(meta['requested_downloads'])
         return (
-            self._to_float(meta.get('duration')),
+            self._to_float(entry.get('duration')),
             requested_video.get('width'),
             requested_video.get('height'),
         )
@@ -275,20 +342,20 @@ class MediaDownloader:
         except TypeError:
             return duration
 
-    def _get_video_filename(self, meta: dict) -> str:
-        return self._get_video_filepath(meta).rsplit('/', maxsplit=1)[-1]
-
-    def _get_video_filepath(self, meta: dict) -> str:
-        if meta['_type'] == self._PLAYLIST_TYPE:
-            requested_downloads: list[dict] = meta['entries'][0]['requested_downloads']
-            requested_video = self._get_requested_video(requested_downloads)
-        else:
-            requested_downloads = meta['requested_downloads']
-            requested_video = self._get_requested_video(requested_downloads)
-
+    def _pick_entry(self, meta: dict) -> dict:
+        """Return downloaded media entry: first playlist entry or meta itself."""
+        if meta['_type'] != self._PLAYLIST_TYPE:
+            return meta
+        if not len(meta['entries']):
+            raise ValueError('Item said to be downloaded but no entries to process.')
+        return meta['entries'][0]
+
+    def _resolve_requested_video(self, entry: dict) -> tuple[dict, str]:
+        """Return requested video download object and its filepath from entry."""
+        requested_video = self._get_requested_video(entry['requested_downloads'])
         try:
-            return requested_video['filepath']
-        except (AttributeError, KeyError):
+            return requested_video, requested_video['filepath']
+        except (TypeError, KeyError):
             err_msg = 'Video filepath not found'
-            self._log.exception('%s, meta: %s', err_msg, meta)
+            self._log.exception('%s, meta: %s', err_msg, entry)
             raise ValueError(err_msg)
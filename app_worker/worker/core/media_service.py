@@ -79,12 +79,9 @@ class MediaService:
         host_conf: AbstractHostConfig,
     ) -> DownMedia:
         try:
-            return await asyncio.get_running_loop().run_in_executor(
-                None,
-                lambda: self._downloader.download(
-                    host_conf=host_conf,
-                    media_payload=self._media_payload,
-                ),
+            return await self._downloader.download(
+                host_conf=host_conf,
+                media_payload=self._media_payload,
             )
         except Exception as err:
             self._log.exception(
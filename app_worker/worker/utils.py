@@ -1,3 +1,5 @@
+from copy import deepcopy
+from functools import cache, lru_cache
 from pathlib import Path
 
 import yt_dlp
@@ -7,9 +9,18 @@ _COOKIES_FILEPATH = Path('/app/cookies/cookies.txt')
 
 def cli_to_api(opts: list) -> dict:
     """Convert yt-dlp CLI options to internal API ones."""
-    default = yt_dlp.parse_options([]).ydl_opts
+    # Return a copy since callers modify converted options, e.g. output template.
+    return deepcopy(_cli_to_api(tuple(opts)))
+
+
+@lru_cache(maxsize=8)
+def _cli_to_api(opts: tuple[str, ...]) -> dict:
+    """Cache conversion to parse options only once per distinct host config."""
+    default = _get_default_api_opts()
     diff = {
-        k: v for k, v in yt_dlp.parse_options(opts).ydl_opts.items() if default[k] != v
+        k: v
+        for k, v in yt_dlp.parse_options(list(opts)).ydl_opts.items()
+        if default[k] != v
     }
     if 'postprocessors' in diff:
         diff['postprocessors'] = [
@@ -18,6 +29,11 @@ def cli_to_api(opts: list) -> dict:
     return diff
 
 
+@cache
+def _get_default_api_opts() -> dict:
+    return yt_dlp.parse_options([]).ydl_opts
+
+
 def is_file_empty(filepath: Path) -> bool:
     """Check whether the file is empty."""
     return filepath.is_file() and filepath.stat().st_size == 0
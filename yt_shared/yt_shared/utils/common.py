@@ -34,6 +34,16 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class LazyStr:
+    """Defer string computation until logging record is actually formatted."""
+
+    def __init__(self, func: Callable[[], Any]) -> None:
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+
 def get_env_bool(string: str | bool) -> bool:
     if isinstance(string, str):
         return string.lower() in ('true',)